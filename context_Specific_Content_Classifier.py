@@ -1,19 +1,67 @@
 import requests
+import numpy as np
 import pandas as pd
 import re
 import os
 import shutil
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import time
 
-def test_ollama_connection(model='llama2'):
+from ollama import AsyncClient
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared session so the synchronous call sites reuse pooled keep-alive
+# connections instead of paying a TCP handshake per request
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                                     max_retries=Retry(total=2, backoff_factor=0.3)))
+SESSION.headers.update({"Connection": "keep-alive"})
+
+# Default model: a small Q4_K_M-quantized 3B instruct model is plenty for
+# classification + five integer ratings and decodes far faster than llama2-7B.
+# Override with ESSAY_CLASSIFIER_MODEL to use a different one.
+DEFAULT_MODEL = os.environ.get("ESSAY_CLASSIFIER_MODEL", "llama3.2:3b-instruct-q4_K_M")
+
+def test_ollama_connection(model=DEFAULT_MODEL):
     """Test if Ollama is running and accessible"""
     print("🔧 Testing Ollama connection...")
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=10)
+        response = SESSION.get("http://localhost:11434/api/tags", timeout=10)
         if response.status_code == 200:
             models = response.json().get('models', [])
-            print(f"✅ Ollama is running! Available models: {[m['name'] for m in models]}")
+            model_names = [m['name'] for m in models]
+            print(f"✅ Ollama is running! Available models: {model_names}")
+
+            if not any(name == model or name.startswith(f"{model}:") for name in model_names):
+                print(f"⚠️ Configured model '{model}' not found locally. "
+                      f"Pull it first: ollama pull {model}")
+
+            # Warmup request pins the model weights in memory (keep_alive=-1)
+            # so the first real classification doesn't pay the load cost
+            try:
+                SESSION.post(
+                    "http://localhost:11434/api/generate",
+                    json={"model": model, "prompt": "", "keep_alive": -1},
+                    timeout=120
+                )
+                print(f"🔥 Model '{model}' preloaded and pinned in memory")
+            except Exception as e:
+                print(f"⚠️ Model warmup failed (continuing anyway): {e}")
+
+            # Surface the parallelism settings the async phases depend on
+            num_parallel = os.environ.get("OLLAMA_NUM_PARALLEL")
+            max_loaded = os.environ.get("OLLAMA_MAX_LOADED_MODELS")
+            if num_parallel:
+                print(f"⚙️ OLLAMA_NUM_PARALLEL={num_parallel}")
+            else:
+                print("⚠️ OLLAMA_NUM_PARALLEL is not set - Ollama defaults to serial "
+                      "request handling. For concurrent phases: export OLLAMA_NUM_PARALLEL=8")
+            if max_loaded:
+                print(f"⚙️ OLLAMA_MAX_LOADED_MODELS={max_loaded}")
+
             return True
         else:
             print(f"❌ Ollama responded with status code: {response.status_code}")
@@ -25,181 +73,310 @@ def test_ollama_connection(model='llama2'):
         print(f"❌ Error testing connection: {e}")
         return False
 
-def ollama_classify_score(essay, model='llama2'):
-    """WORKING classification function from v3.0"""
-    prompt = f"""You are an expert essay classifier. Read this essay carefully and determine if it is SPECIFICALLY about Independence Day.
-
-INDEPENDENCE DAY topics include:
-- August 15th celebrations
-- Indian freedom struggle 
-- Freedom fighters (Gandhi, Nehru, etc.)
-- Flag hoisting ceremonies
-- Patriotic themes related to India's independence
-
-NON-INDEPENDENCE DAY topics include:
-- Sports, technology, education, environment
-- Career goals, social media, books
-- General topics not related to Indian independence
-
-Essay to classify:
-{essay[:800]}
+# Keyword alternations compiled once; one C-level pass over the essay
+# replaces K Python-level substring scans, and re.I drops the .lower() copy
+IND_PAT = re.compile(
+    r'\b(?:independence day|august 15|15th august|freedom struggle'
+    r'|british rule|gandhi|nehru|freedom fighter|patriotic'
+    r'|tiranga|tricolor|national flag|red fort|partition)\b', re.IGNORECASE)
+OTHER_PAT = re.compile(
+    r'\b(?:social media|facebook|instagram|environmental protection'
+    r'|climate change|career goals|software engineer|online education'
+    r'|covid-19|sports importance|basketball|cricket|wings of fire)\b', re.IGNORECASE)
+
+def _keyword_override(essay):
+    """v3.0 fallback: rescue essays the model rejected but that clearly
+    hit Independence Day keywords"""
+    independence_score = len(IND_PAT.findall(essay))
+    other_score = len(OTHER_PAT.findall(essay))
+
+    return independence_score > other_score and independence_score >= 2
+
+# Response-parsing patterns, compiled once instead of per call
+_BATCH_RESULT_RE = re.compile(r'RESULT\s+(\d+):\s*(YES|NO)\s*SCORE[:\s]*([\d.]+)', re.IGNORECASE)
+_CLASS_RE = re.compile(r'CLASSIFICATION:\s*(YES|NO)', re.IGNORECASE)
+_SCORE_RE = re.compile(r'SCORE:\s*([1-5](?:\.[0-9])?)', re.IGNORECASE)
+_RATING_PATTERNS = {
+    'relevance': re.compile(r'Relevance:\s*(\d+)', re.IGNORECASE),
+    'content': re.compile(r'Content:\s*(\d+)', re.IGNORECASE),
+    'writing': re.compile(r'Writing:\s*(\d+)', re.IGNORECASE),
+    'original': re.compile(r'Original:\s*(\d+)', re.IGNORECASE),
+    'impact': re.compile(r'Impact:\s*(\d+)', re.IGNORECASE)
+}
+_STRENGTHS_RE = re.compile(r'Strengths:\s*(.+?)(?=Topics:|$)', re.IGNORECASE | re.DOTALL)
+_TOPICS_RE = re.compile(r'Topics:\s*(.+?)$', re.IGNORECASE | re.DOTALL)
+
+# Early-stop markers for streamed replies: a NO verdict is complete once
+# its SCORE line lands, a YES one once the Topics line is terminated
+_NO_DONE_RE = re.compile(r'CLASSIFICATION:\s*NO.*?SCORE:\s*[1-5](?:\.[0-9])?', re.IGNORECASE | re.DOTALL)
+_ANALYSIS_DONE_RE = re.compile(r'Topics:\s*\S.*\n', re.IGNORECASE)
+
+# Number of essays packed into one classification request; keeps the
+# combined prompt comfortably inside the model's context window
+CLASSIFY_BATCH_SIZE = 6
+
+def _llm_semaphore():
+    """Backpressure for the concurrent LLM calls: at most
+    OLLAMA_NUM_PARALLEL requests in flight (Ollama queues the rest).
+
+    Created per event loop - asyncio primitives can't be shared across
+    the separate asyncio.run() calls the phases make.
+    """
+    return asyncio.Semaphore(int(os.environ.get("OLLAMA_NUM_PARALLEL", 4)))
+
+def _parse_analysis(output):
+    """Parse the 1-10 ratings, strengths/topics and grade out of a reply"""
+    analysis = {}
+    scores = []
+    for key, pattern in _RATING_PATTERNS.items():
+        match = pattern.search(output)
+        if match:
+            score = int(match.group(1))
+            analysis[key] = min(max(score, 1), 10)  # Ensure 1-10 range
+            scores.append(analysis[key])
+        else:
+            analysis[key] = 6  # Default
+            scores.append(6)
+
+    # Calculate overall score
+    analysis['overall_score'] = sum(scores) / len(scores)
+
+    # Extract text sections
+    strengths_match = _STRENGTHS_RE.search(output)
+    topics_match = _TOPICS_RE.search(output)
+
+    analysis['strengths'] = strengths_match.group(1).strip() if strengths_match else "Good Independence Day essay"
+    analysis['topics'] = topics_match.group(1).strip() if topics_match else "Independence Day themes"
+
+    # Assign grade
+    score = analysis['overall_score']
+    if score >= 9:
+        grade = "A+"
+    elif score >= 8:
+        grade = "A"
+    elif score >= 7:
+        grade = "B+"
+    elif score >= 6:
+        grade = "B"
+    elif score >= 5:
+        grade = "C+"
+    else:
+        grade = "C"
+
+    analysis['grade'] = grade
+    analysis['raw_output'] = output
+
+    return analysis
+
+async def rate_essay(essay, filename, model=DEFAULT_MODEL, client=None, semaphore=None):
+    """Ratings-only follow-up for essays accepted without ratings.
+
+    Keyword-rescued essays get a NO reply with no ratings attached; this
+    asks for the 5-axis ratings unconditionally so they are judged like
+    any other accepted essay. Returns an analysis dict, or None on error.
+    """
+    # Terse prompt: instructions only, no repeated explanations per aspect
+    prompt = f"""Rate this Independence Day essay 1-10 per aspect. Reply EXACTLY:
+Relevance: n
+Content: n
+Writing: n
+Original: n
+Impact: n
+Strengths: brief list
+Topics: topics covered
+
+ESSAY ({filename}):
+{essay[:1000]}"""
+
+    if client is None:
+        client = AsyncClient(timeout=45)  # Shorter timeout
+    if semaphore is None:
+        semaphore = _llm_semaphore()
 
-IMPORTANT: Respond in EXACTLY this format:
-TOPIC: [Independence Day] OR [Other Topic]
-CLASSIFICATION: [YES] OR [NO]
-SCORE: [1.0 to 5.0]
+    try:
+        async with semaphore:  # don't oversubscribe the Ollama server
+            stream = await client.generate(
+                model=model,
+                prompt=prompt,
+                options={"temperature": 0.1, "num_predict": 96},
+                keep_alive="30m",
+                stream=True
+            )
+
+            chunks = []
+            try:
+                async for part in stream:
+                    chunks.append(part['response'] or "")
+                    if _ANALYSIS_DONE_RE.search("".join(chunks)):
+                        break
+            finally:
+                await stream.aclose()
 
-Your response:"""
+        return _parse_analysis("".join(chunks).strip())
 
-    try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": model, 
-                "prompt": prompt, 
-                "stream": False,
-                "options": {"temperature": 0.1, "top_p": 0.9}
-            },
-            timeout=90
-        )
-        
-        if response.status_code != 200:
-            return "Error", None, f"HTTP {response.status_code}"
-            
-        output = response.json().get("response", "").strip()
-        
-        # Parse classification
-        classification_match = re.search(r'CLASSIFICATION:\s*(YES|NO)', output, re.IGNORECASE)
-        classification = "Yes" if classification_match and classification_match.group(1).upper() == "YES" else "No"
-        
-        if classification == "No":  # Additional fallback logic from v3.0
-            essay_lower = essay.lower()
-            independence_keywords = [
-                'independence day', 'august 15', '15th august', 'freedom struggle', 
-                'british rule', 'gandhi', 'nehru', 'freedom fighter', 'patriotic',
-                'tiranga', 'tricolor', 'national flag', 'red fort', 'partition'
-            ]
-            other_keywords = [
-                'social media', 'facebook', 'instagram', 'environmental protection', 
-                'climate change', 'career goals', 'software engineer', 'online education',
-                'covid-19', 'sports importance', 'basketball', 'cricket', 'wings of fire'
-            ]
-            
-            independence_score = sum(1 for keyword in independence_keywords if keyword in essay_lower)
-            other_score = sum(1 for keyword in other_keywords if keyword in essay_lower)
-            
-            if independence_score > other_score and independence_score >= 2:
-                classification = "Yes"
-        
-        # Parse score
-        score_match = re.search(r'SCORE:\s*([1-5](?:\.[0-9])?)', output, re.IGNORECASE)
-        score = float(score_match.group(1)) if score_match else 3.0
-        
-        return classification, score, output
-        
     except Exception as e:
-        return "Error", None, str(e)
+        print(f"    ❌ Rating error: {e}")
+        return None
 
-def quick_essay_analysis(essay, filename, model='llama2'):
-    """Simplified, faster analysis that won't timeout"""
-    # Shorter essay content for faster processing
-    essay_preview = essay[:1000] if len(essay) > 1000 else essay
-    
-    prompt = f"""Rate this Independence Day essay quickly on a 1-10 scale:
+async def classify_and_analyze_batch(essays, model=DEFAULT_MODEL, client=None, semaphore=None):
+    """Classify AND rate a batch of essays with a single Ollama request.
 
-Essay: {filename}
-Content: {essay_preview}
+    Returns one (classification, score, analysis, raw_output) tuple per
+    essay, in order; analysis is None for rejected essays. Slots the
+    model's reply didn't cover come back as None so the caller can fall
+    back to a per-essay call.
+    """
+    essay_blocks = "\n".join(
+        f"---ESSAY {i}---\n{essay[:800]}\n" for i, essay in enumerate(essays)
+    )
 
-Rate these 5 aspects (1-10):
-Relevance: How relevant to Independence Day?
-Content: How good is the content?
-Writing: How well written?
-Original: How original/unique?
-Impact: How inspiring/emotional?
+    prompt = f"""For EACH essay below decide if it is SPECIFICALLY about India's Independence Day (Aug 15, freedom struggle, freedom fighters, flag hoisting).
 
-Answer ONLY in this format:
+{essay_blocks}
+
+Reply for each essay, in order, numbered 0 to {len(essays) - 1} exactly as labeled above. For a YES essay, also rate it 1-10 per aspect:
+RESULT 0: YES SCORE 4.5
 Relevance: 8
 Content: 7
 Writing: 9
 Original: 6
 Impact: 8
-Strengths: [Brief list]
-Topics: [Independence Day topics covered]"""
+Strengths: brief list
+Topics: topics covered
+For a NO essay, one line only:
+RESULT 1: NO SCORE 2.0
+
+All {len(essays)} essays, scores 1.0 to 5.0. Your response:"""
+
+    if client is None:
+        client = AsyncClient(timeout=90)
+    if semaphore is None:
+        semaphore = _llm_semaphore()
 
     try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": model, 
-                "prompt": prompt, 
-                "stream": False,
-                "options": {"temperature": 0.1}
-            },
-            timeout=45  # Shorter timeout
-        )
-        
-        if response.status_code != 200:
-            return None
-            
-        output = response.json().get("response", "").strip()
-        print(f"    📊 Analysis response: {output[:150]}...")
-        
-        # Parse ratings
-        analysis = {}
-        patterns = {
-            'relevance': r'Relevance:\s*(\d+)',
-            'content': r'Content:\s*(\d+)',
-            'writing': r'Writing:\s*(\d+)',
-            'original': r'Original:\s*(\d+)',
-            'impact': r'Impact:\s*(\d+)'
-        }
-        
-        scores = []
-        for key, pattern in patterns.items():
-            match = re.search(pattern, output, re.IGNORECASE)
-            if match:
-                score = int(match.group(1))
-                analysis[key] = min(max(score, 1), 10)  # Ensure 1-10 range
-                scores.append(analysis[key])
-            else:
-                analysis[key] = 6  # Default
-                scores.append(6)
-        
-        # Calculate overall score
-        analysis['overall_score'] = sum(scores) / len(scores)
-        
-        # Extract text sections
-        strengths_match = re.search(r'Strengths:\s*(.+?)(?=Topics:|$)', output, re.IGNORECASE | re.DOTALL)
-        topics_match = re.search(r'Topics:\s*(.+?)$', output, re.IGNORECASE | re.DOTALL)
-        
-        analysis['strengths'] = strengths_match.group(1).strip() if strengths_match else "Good Independence Day essay"
-        analysis['topics'] = topics_match.group(1).strip() if topics_match else "Independence Day themes"
-        
-        # Assign grade
-        score = analysis['overall_score']
-        if score >= 9:
-            grade = "A+"
-        elif score >= 8:
-            grade = "A"
-        elif score >= 7:
-            grade = "B+"
-        elif score >= 6:
-            grade = "B"
-        elif score >= 5:
-            grade = "C+"
+        async with semaphore:
+            response = await client.generate(
+                model=model,
+                prompt=prompt,
+                options={"temperature": 0.1, "top_p": 0.9, "num_predict": 96 * len(essays)},
+                keep_alive="30m",
+                stream=False
+            )
+        output = (response['response'] or "").strip()
+    except Exception:
+        return [None] * len(essays)
+
+    results = [None] * len(essays)
+    matches = list(_BATCH_RESULT_RE.finditer(output))
+
+    # Validate the numbering before trusting any per-index verdict - a
+    # misattributed NO would move the wrong file into wrong_files/
+    indices = [int(m.group(1)) for m in matches]
+    if sorted(indices) == list(range(1, len(essays) + 1)):
+        # Model numbered the essays 1-based despite the 0-based labels
+        indices = [i - 1 for i in indices]
+    elif len(set(indices)) != len(indices) or any(i >= len(essays) for i in indices):
+        # Duplicated or out-of-range numbering; discard the whole batch
+        # and let the caller re-process every essay individually
+        return results
+
+    for j, (idx, match) in enumerate(zip(indices, matches)):
+        # Everything up to the next RESULT line belongs to this essay
+        block_end = matches[j + 1].start() if j + 1 < len(matches) else len(output)
+        block = output[match.start():block_end]
+
+        try:
+            score = min(max(float(match.group(3)), 1.0), 5.0)
+        except ValueError:
+            score = 3.0
+
+        if match.group(2).upper() == "YES":
+            results[idx] = ("Yes", score, _parse_analysis(block), block)
+        elif _keyword_override(essays[idx]):
+            # Model said NO but the keywords disagree; leave analysis to
+            # the per-essay fallback since the block carries no ratings
+            results[idx] = ("Yes", score, None, block)
         else:
-            grade = "C"
-        
-        analysis['grade'] = grade
-        analysis['raw_output'] = output
-        
-        return analysis
-        
+            results[idx] = ("No", score, None, block)
+
+    return results
+
+async def classify_and_analyze(essay, filename, model=DEFAULT_MODEL, client=None, semaphore=None):
+    """Classify and rate one essay in a single round trip.
+
+    Returns (classification, score, analysis, raw_output); analysis is
+    None for rejected essays.
+    """
+    # Terse prompt: the old ~150-token preamble dominated prefill cost
+    prompt = f"""Is this essay SPECIFICALLY about India's Independence Day (Aug 15, freedom struggle, freedom fighters, flag hoisting)? Reply EXACTLY:
+CLASSIFICATION: YES or NO
+SCORE: 1.0 to 5.0
+If YES, also rate the essay 1-10 per aspect:
+Relevance: n
+Content: n
+Writing: n
+Original: n
+Impact: n
+Strengths: brief list
+Topics: topics covered
+
+ESSAY ({filename}):
+{essay[:1000]}"""
+
+    if client is None:
+        client = AsyncClient(timeout=90)
+    if semaphore is None:
+        semaphore = _llm_semaphore()
+
+    try:
+        async with semaphore:  # don't oversubscribe the Ollama server
+            stream = await client.generate(
+                model=model,
+                prompt=prompt,
+                options={"temperature": 0.1, "top_p": 0.9, "num_predict": 128},
+                keep_alive="30m",
+                stream=True
+            )
+
+            # Consume deltas and cut the connection as soon as the reply
+            # is parseable - the server stops decoding the trailing tokens
+            chunks = []
+            try:
+                async for part in stream:
+                    chunks.append(part['response'] or "")
+                    joined = "".join(chunks)
+                    if _NO_DONE_RE.search(joined) or _ANALYSIS_DONE_RE.search(joined):
+                        break
+            finally:
+                await stream.aclose()
+
+        output = "".join(chunks).strip()
+
+        # Parse classification
+        classification_match = _CLASS_RE.search(output)
+        classification = "Yes" if classification_match and classification_match.group(1).upper() == "YES" else "No"
+
+        # Parse score
+        score_match = _SCORE_RE.search(output)
+        score = float(score_match.group(1)) if score_match else 3.0
+
+        if classification == "Yes":
+            analysis = _parse_analysis(output)
+        elif _keyword_override(essay):  # Additional fallback logic from v3.0
+            # The NO reply carries no ratings, so rate the rescued essay
+            # for real instead of letting _parse_analysis emit defaults
+            classification = "Yes"
+            analysis = await rate_essay(essay, filename, model=model,
+                                        client=client, semaphore=semaphore)
+        else:
+            analysis = None
+
+        return classification, score, analysis, output
+
     except Exception as e:
-        print(f"    ❌ Quick analysis error: {e}")
-        return None
+        return "Error", None, None, str(e)
 
-def simple_comparative_ranking(essays_data, model='llama2'):
+def simple_comparative_ranking(essays_data, model=DEFAULT_MODEL):
     """Simpler comparative ranking that won't timeout"""
     
     # Create a concise summary
@@ -226,13 +403,14 @@ Give final ranking in this format:
 Keep explanations brief (1 sentence each)."""
 
     try:
-        response = requests.post(
+        response = SESSION.post(
             "http://localhost:11434/api/generate",
             json={
-                "model": model, 
-                "prompt": prompt, 
+                "model": model,
+                "prompt": prompt,
                 "stream": False,
-                "options": {"temperature": 0.2}
+                "options": {"temperature": 0.2},
+                "keep_alive": "30m"
             },
             timeout=60  # Shorter timeout
         )
@@ -246,11 +424,15 @@ Keep explanations brief (1 sentence each)."""
     except Exception as e:
         return f"Ranking error: {str(e)}"
 
-def read_file_content(file_path):
-    """Read content from various file formats"""
+def read_file_content(file_path, max_bytes=4096):
+    """Read content from various file formats.
+
+    Reads at most max_bytes - no downstream consumer uses more than
+    ~1000 characters, so loading whole files just wastes memory and I/O.
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+            content = file.read(max_bytes)
             print(f"  📄 File read successfully: {len(content)} characters")
             return content
     except Exception as e:
@@ -258,7 +440,11 @@ def read_file_content(file_path):
         return f"Error reading file: {str(e)}"
 
 def process_essay_folder_with_quick_analysis(input_folder_path):
-    """Enhanced processing with faster, more reliable analysis"""
+    """Enhanced processing with faster, more reliable analysis.
+
+    Uses DEFAULT_MODEL (ESSAY_CLASSIFIER_MODEL env var); a small Q4_K_M
+    quantized model is recommended for speed on this workload.
+    """
     input_folder = Path(input_folder_path)
     
     if not input_folder.exists():
@@ -266,7 +452,7 @@ def process_essay_folder_with_quick_analysis(input_folder_path):
         return []
     
     if not test_ollama_connection():
-        print("\n💡 Make sure Ollama is running: ollama run llama2")
+        print(f"\n💡 Make sure Ollama is running: ollama run {DEFAULT_MODEL}")
         return []
     
     # Create folders
@@ -275,97 +461,122 @@ def process_essay_folder_with_quick_analysis(input_folder_path):
     wrong_files_folder.mkdir(exist_ok=True)
     analysis_folder.mkdir(exist_ok=True)
     
-    # Get all text files
-    text_extensions = ['.txt', '.md', '.rtf']
-    essay_files = []
-    for ext in text_extensions:
-        essay_files.extend(list(input_folder.glob(f'*{ext}')))
+    # Get all text files in one directory scan instead of a glob per extension
+    with os.scandir(input_folder) as it:
+        essay_files = [Path(entry.path) for entry in it
+                       if entry.is_file() and entry.name.lower().endswith(('.txt', '.md', '.rtf'))]
     
     if not essay_files:
         print(f"❌ No essay files found in '{input_folder_path}'")
         return []
     
-    print(f"\n🎯 PHASE 1: Classification of {len(essay_files)} essays")
+    print(f"\n🎯 PHASE 1: Classification & Analysis of {len(essay_files)} essays")
     print("="*80)
-    
-    # Phase 1: Basic classification
-    independence_day_essays = []
+
+    # Phase 1: Combined classification + analysis (all essays sent concurrently)
+    # Reads are independent, so overlap the disk latency across files
+    print(f"\n📁 Reading {len(essay_files)} files in parallel...")
+    with ThreadPoolExecutor(max_workers=min(32, len(essay_files))) as executor:
+        contents = list(executor.map(read_file_content, essay_files))
+
+    readable = [(fp, c) for fp, c in zip(essay_files, contents)
+                if not c.startswith("Error reading file")]
+
+    async def _classify_all(pairs):
+        client = AsyncClient(timeout=90)
+        semaphore = _llm_semaphore()
+
+        # Batch essays so the instruction preamble and HTTP overhead are
+        # amortized across several essays per request
+        batches = [pairs[i:i + CLASSIFY_BATCH_SIZE]
+                   for i in range(0, len(pairs), CLASSIFY_BATCH_SIZE)]
+        batch_results = await asyncio.gather(*[
+            classify_and_analyze_batch([content for _, content in batch],
+                                       client=client, semaphore=semaphore)
+            for batch in batches
+        ])
+        results = [r for batch in batch_results for r in batch]
+
+        # Per-essay fallback for slots the batched reply didn't cover or
+        # accepted essays that still lack ratings (keyword rescues)
+        missing = [i for i, r in enumerate(results)
+                   if r is None or (r[0] == "Yes" and r[2] is None)]
+        if missing:
+            print(f"  🔁 Re-processing {len(missing)} essays individually (batch parse miss)")
+            fallback = await asyncio.gather(*[
+                classify_and_analyze(pairs[i][1], pairs[i][0].name,
+                                     client=client, semaphore=semaphore)
+                for i in missing
+            ])
+            for i, r in zip(missing, fallback):
+                results[i] = r
+
+        return results
+
+    print(f"\n  📤 Sending {len(readable)} essays to LLM in batches of {CLASSIFY_BATCH_SIZE}...")
+    classification_results = asyncio.run(_classify_all(readable))
+
+    successful_analyses = []
     wrong_topic_essays = []
-    
-    for i, file_path in enumerate(essay_files, 1):
-        print(f"\n📁 Processing {i}/{len(essay_files)}: {file_path.name}")
+
+    for (file_path, content), (classification, score, analysis, raw_response) in zip(readable, classification_results):
+        print(f"\n📁 {file_path.name}")
         print("-" * 50)
-        
-        content = read_file_content(file_path)
-        if content.startswith("Error reading file"):
-            continue
-        
-        print(f"  📝 Preview: {content[:80]}...")
-        print(f"  📤 Sending to LLM...")
-        
-        classification, score, raw_response = ollama_classify_score(content)
         print(f"  📥 Response: {raw_response[:100]}...")
         print(f"  📊 Result: {classification}, Score: {score}")
-        
+
         if classification == "Error":
             print(f"  ❌ Classification error: {raw_response}")
         elif classification.lower() == 'yes':
-            independence_day_essays.append({
+            if not analysis:
+                print(f"  ⚠️ Analysis missing - using defaults")
+                # Provide basic default analysis
+                analysis = {
+                    'overall_score': 6.0,
+                    'relevance': 6, 'content': 6, 'writing': 6, 'original': 6, 'impact': 6,
+                    'grade': 'B', 'strengths': 'Independence Day themed essay',
+                    'topics': 'Independence Day celebrations'
+                }
+            successful_analyses.append({
                 'filename': file_path.name,
                 'filepath': str(file_path),
                 'content': content,
-                'basic_score': score
+                'word_count': len(content.split()),  # computed once, reused in CSV assembly
+                'basic_score': score,
+                'analysis': analysis
             })
-            print(f"  ✅ Independence Day essay")
+            print(f"  ✅ Independence Day essay - "
+                  f"Overall: {analysis['overall_score']:.1f}/10 ({analysis['grade']})")
         elif classification.lower() == 'no':
             wrong_topic_essays.append({'filename': file_path.name})
             print(f"  ❌ Moving to wrong_files")
-            
+
             try:
                 destination = wrong_files_folder / file_path.name
-                shutil.move(str(file_path), str(destination))
+                try:
+                    # wrong_files_folder lives inside input_folder, so this
+                    # is a single renameat syscall instead of copy+unlink
+                    file_path.rename(destination)
+                except OSError:
+                    shutil.move(str(file_path), str(destination))
                 print(f"    📁 Moved to: {destination}")
             except Exception as e:
                 print(f"    ⚠️ Move error: {e}")
-        
-        time.sleep(1)  # Brief pause
-    
-    if not independence_day_essays:
+
+    if not successful_analyses:
         print("❌ No Independence Day essays found!")
         return []
-    
-    print(f"\n🎯 PHASE 2: Quick Analysis of {len(independence_day_essays)} essays")
-    print("="*80)
-    
-    # Phase 2: Quick analysis
-    successful_analyses = []
-    
-    for i, essay_data in enumerate(independence_day_essays, 1):
-        print(f"\n📊 Analyzing {i}/{len(independence_day_essays)}: {essay_data['filename']}")
-        
-        analysis = quick_essay_analysis(essay_data['content'], essay_data['filename'])
-        
-        if analysis:
-            essay_data['analysis'] = analysis
-            successful_analyses.append(essay_data)
-            print(f"  ✅ Success - Overall: {analysis['overall_score']:.1f}/10 ({analysis['grade']})")
-        else:
-            print(f"  ⚠️ Analysis failed - using defaults")
-            # Provide basic default analysis
-            essay_data['analysis'] = {
-                'overall_score': 6.0,
-                'relevance': 6, 'content': 6, 'writing': 6, 'original': 6, 'impact': 6,
-                'grade': 'B', 'strengths': 'Independence Day themed essay',
-                'topics': 'Independence Day celebrations'
-            }
-            successful_analyses.append(essay_data)
-        
-        time.sleep(1)
-    
-    print(f"\n🎯 PHASE 3: Final Ranking")
+
+    # Analysis is done with the content now; nothing downstream uses more
+    # than ~1000 chars (multi-zone previews slice [:400]), so drop the
+    # rest instead of keeping full essays in RAM for the whole run
+    for essay_data in successful_analyses:
+        essay_data['content'] = essay_data['content'][:1000]
+
+    print(f"\n🎯 PHASE 2: Final Ranking")
     print("="*80)
     
-    # Phase 3: Simple ranking
+    # Phase 2: Simple ranking
     print(f"🔬 Generating final ranking...")
     final_ranking = simple_comparative_ranking(successful_analyses)
     
@@ -380,58 +591,61 @@ def process_essay_folder_with_quick_analysis(input_folder_path):
                              key=lambda x: x['analysis']['overall_score'], 
                              reverse=True)
         
-        # Create report
-        report = "# INDEPENDENCE DAY ESSAY COMPETITION RESULTS\n\n"
-        report += f"## OVERVIEW\n"
-        report += f"- Total submissions: {len(essay_files)}\n"
-        report += f"- Valid Independence Day essays: {len(successful_analyses)}\n"
-        report += f"- Disqualified (other topics): {len(wrong_topic_essays)}\n\n"
-        
-        report += "## ESSAY SCORES\n\n"
-        
+        # Create report (list + join avoids O(N^2) string reallocation)
+        parts = [
+            "# INDEPENDENCE DAY ESSAY COMPETITION RESULTS\n\n",
+            "## OVERVIEW\n",
+            f"- Total submissions: {len(essay_files)}\n",
+            f"- Valid Independence Day essays: {len(successful_analyses)}\n",
+            f"- Disqualified (other topics): {len(wrong_topic_essays)}\n\n",
+            "## ESSAY SCORES\n\n"
+        ]
+
         for i, essay in enumerate(sorted_essays, 1):
             analysis = essay['analysis']
-            report += f"### {i}. {essay['filename']} - {analysis['overall_score']:.1f}/10 ({analysis['grade']})\n\n"
-            report += f"**Detailed Scores:**\n"
-            report += f"- Relevance to Independence Day: {analysis['relevance']}/10\n"
-            report += f"- Content Quality: {analysis['content']}/10\n"
-            report += f"- Writing Quality: {analysis['writing']}/10\n"
-            report += f"- Originality: {analysis['original']}/10\n"
-            report += f"- Emotional Impact: {analysis['impact']}/10\n\n"
-            report += f"**Key Strengths:** {analysis['strengths']}\n\n"
-            report += f"**Independence Day Topics:** {analysis['topics']}\n\n"
-            report += "---\n\n"
-        
+            parts.extend([
+                f"### {i}. {essay['filename']} - {analysis['overall_score']:.1f}/10 ({analysis['grade']})\n\n",
+                f"**Detailed Scores:**\n",
+                f"- Relevance to Independence Day: {analysis['relevance']}/10\n",
+                f"- Content Quality: {analysis['content']}/10\n",
+                f"- Writing Quality: {analysis['writing']}/10\n",
+                f"- Originality: {analysis['original']}/10\n",
+                f"- Emotional Impact: {analysis['impact']}/10\n\n",
+                f"**Key Strengths:** {analysis['strengths']}\n\n",
+                f"**Independence Day Topics:** {analysis['topics']}\n\n",
+                "---\n\n"
+            ])
+
         if final_ranking:
-            report += "## JUDGE'S FINAL RANKING\n\n"
-            report += final_ranking + "\n\n"
+            parts.extend(["## JUDGE'S FINAL RANKING\n\n", final_ranking, "\n\n"])
+
+        report = "".join(parts)
         
         # Save files
         report_path = analysis_folder / "competition_results.md"
         with open(report_path, 'w', encoding='utf-8') as f:
             f.write(report)
         
-        # CSV data
-        csv_data = []
-        for essay in successful_analyses:
-            analysis = essay['analysis']
-            csv_data.append({
-                'filename': essay['filename'],
-                'overall_score': analysis['overall_score'],
-                'grade': analysis['grade'],
-                'relevance': analysis['relevance'],
-                'content_quality': analysis['content'],
-                'writing_quality': analysis['writing'],
-                'originality': analysis['original'],
-                'emotional_impact': analysis['impact'],
-                'strengths': analysis['strengths'],
-                'topics_covered': analysis['topics'],
-                'word_count': len(essay['content'].split())
-            })
-        
-        df = pd.DataFrame(csv_data)
-        df = df.sort_values('overall_score', ascending=False)
-        df.to_csv(analysis_folder / "essay_scores.csv", index=False)
+        # CSV data: column-wise construction with explicit dtypes skips
+        # per-row dict hashing and pandas' type-inference pass
+        n = len(successful_analyses)
+        analyses = [essay['analysis'] for essay in successful_analyses]
+        df = pd.DataFrame({
+            'filename': [essay['filename'] for essay in successful_analyses],
+            'overall_score': np.fromiter((a['overall_score'] for a in analyses),
+                                         dtype=np.float32, count=n),
+            'grade': [a['grade'] for a in analyses],
+            'relevance': np.fromiter((a['relevance'] for a in analyses), dtype=np.int8, count=n),
+            'content_quality': np.fromiter((a['content'] for a in analyses), dtype=np.int8, count=n),
+            'writing_quality': np.fromiter((a['writing'] for a in analyses), dtype=np.int8, count=n),
+            'originality': np.fromiter((a['original'] for a in analyses), dtype=np.int8, count=n),
+            'emotional_impact': np.fromiter((a['impact'] for a in analyses), dtype=np.int8, count=n),
+            'strengths': [a['strengths'] for a in analyses],
+            'topics_covered': [a['topics'] for a in analyses],
+            'word_count': [essay['word_count'] for essay in successful_analyses]
+        })
+        df.sort_values('overall_score', ascending=False, kind='stable', inplace=True)
+        df.to_csv(analysis_folder / "essay_scores.csv", index=False, lineterminator='\n')
         
         # Print results summary
         print(f"💾 Results saved to: {analysis_folder}/")
@@ -461,7 +675,7 @@ def process_essay_folder_with_quick_analysis(input_folder_path):
     return successful_analyses  # Return for multi-zone use
 
 # MULTI-ZONE FUNCTIONS
-def process_single_zone_for_multi(zone_folder_path, zone_name, model='llama2'):
+def process_single_zone_for_multi(zone_folder_path, zone_name, model=DEFAULT_MODEL):
     """
     Wrapper around existing process_essay_folder_with_quick_analysis 
     but returns top 3 essays for multi-zone comparison
@@ -484,38 +698,42 @@ def process_single_zone_for_multi(zone_folder_path, zone_name, model='llama2'):
     top_3_data = []
     for i in range(min(3, len(sorted_essays))):
         essay = sorted_essays[i]
+        analysis = essay['analysis']
         top_3_data.append({
             'filename': essay['filename'],
             'zone': zone_name,
             'content': essay['content'],
-            'overall_score': essay['analysis']['overall_score'],
-            'grade': essay['analysis']['grade'],
-            'strengths': essay['analysis']['strengths'],
-            'analysis': essay['analysis'],
-            'zone_rank': i + 1
+            'overall_score': analysis['overall_score'],
+            'grade': analysis['grade'],
+            'strengths': analysis['strengths'],
+            'analysis': analysis,
+            'zone_rank': i + 1,
+            # Pre-formatted block for the grand-judge prompt so
+            # compare_zones_top_essays just joins ready strings
+            '_summary_line': (
+                f"\nEssay: {essay['filename']} (from {zone_name})\n"
+                f"Zone Rank: #{i + 1}, Zone Score: {analysis['overall_score']:.1f}/10\n"
+                f"Strengths: {analysis['strengths']}\n"
+                f"Content Preview: {essay['content'][:400]}...\n"
+            )
         })
     
     print(f"✅ {zone_name}: Top {len(top_3_data)} essays selected for grand competition")
     return top_3_data
 
-def compare_zones_top_essays(all_zone_essays, model='llama2'):
+def compare_zones_top_essays(all_zone_essays, model=DEFAULT_MODEL):
     """Compare top essays from all zones"""
     
-    # Create summary for LLM
-    combined_summary = ""
-    essay_count = 0
-    
+    # Create summary for LLM from the blocks pre-formatted per essay in
+    # process_single_zone_for_multi - this path just joins ready strings
+    summary_parts = []
+
     for zone_essays in all_zone_essays:
         if zone_essays:  # If zone has essays
-            zone_name = zone_essays[0]['zone']
-            combined_summary += f"\n=== {zone_name} Top Essays ===\n"
-            
-            for essay in zone_essays:
-                essay_count += 1
-                combined_summary += f"\nEssay {essay_count}: {essay['filename']} (from {zone_name})\n"
-                combined_summary += f"Zone Rank: #{essay['zone_rank']}, Zone Score: {essay['overall_score']:.1f}/10\n"
-                combined_summary += f"Strengths: {essay['strengths']}\n"
-                combined_summary += f"Content Preview: {essay['content'][:400]}...\n"
+            summary_parts.append(f"\n=== {zone_essays[0]['zone']} Top Essays ===\n")
+            summary_parts.extend(essay['_summary_line'] for essay in zone_essays)
+
+    combined_summary = "".join(summary_parts)
     
     prompt = f"""You are the GRAND JUDGE for a multi-zone Independence Day essay competition. 
 
@@ -560,13 +778,14 @@ GRAND CHAMPION CITATION:
 """
 
     try:
-        response = requests.post(
+        response = SESSION.post(
             "http://localhost:11434/api/generate",
             json={
-                "model": model, 
-                "prompt": prompt, 
+                "model": model,
+                "prompt": prompt,
                 "stream": False,
-                "options": {"temperature": 0.3}
+                "options": {"temperature": 0.3},
+                "keep_alive": "30m"
             },
             timeout=180
         )